@@ -3,16 +3,37 @@ API Cloud pour le portail familles
 Version adaptée pour le déploiement (Railway/Heroku)
 """
 
+import atexit
+import hmac
+import logging
+import logging.handlers
 import os
+import queue
 import sys
 import secrets
+import time
+import orjson
 from datetime import datetime
 from pathlib import Path
-from flask import Flask, request, jsonify
+from flask import Flask, request, abort, stream_with_context
 from flask_cors import CORS
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Boolean, Text, ForeignKey, func, text
+from flask_compress import Compress
+from sqlalchemy import create_engine, Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Index, bindparam, delete, func, insert, select, text, tuple_, update
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.orm import sessionmaker, scoped_session, relationship, raiseload
+
+# Journalisation : les requêtes déposent les messages dans une file,
+# un thread dédié (QueueListener) les formate et les écrit sur stdout
+logger = logging.getLogger('mely_api')
+logger.setLevel(logging.INFO)
+logger.propagate = False
+_log_queue = queue.SimpleQueue()
+logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+_log_stream = logging.StreamHandler(sys.stdout)
+_log_stream.setFormatter(logging.Formatter('%(levelname)s %(message)s'))
+_log_listener = logging.handlers.QueueListener(_log_queue, _log_stream)
+_log_listener.start()
+atexit.register(_log_listener.stop)
 
 # Configuration de la base de données
 # En production (Render), utiliser DATABASE_URL de l'environnement
@@ -33,8 +54,34 @@ else:
         DATABASE_URL = 'sqlite:///./mely.db'
 
 # SQLAlchemy setup
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+if DATABASE_URL.startswith('sqlite'):
+    engine = create_engine(
+        DATABASE_URL,
+        connect_args={'check_same_thread': False},
+        query_cache_size=1200,
+        future=True
+    )
+else:
+    # PostgreSQL : pool dimensionné pour la charge, connexions vérifiées et recyclées
+    # (Render/Heroku coupent les connexions inactives)
+    engine = create_engine(
+        DATABASE_URL,
+        pool_size=10,
+        max_overflow=20,
+        pool_pre_ping=True,
+        pool_recycle=1800,
+        query_cache_size=1200,
+        future=True
+    )
+# Session par requête : SessionLocal() renvoie la même session pendant toute la requête.
+# expire_on_commit=False : les objets restent lisibles après commit sans SELECT de
+# rafraîchissement (la session est de toute façon jetée en fin de requête)
+SessionLocal = scoped_session(sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    expire_on_commit=False,
+    bind=engine
+))
 Base = declarative_base()
 
 
@@ -63,7 +110,15 @@ class Famille(Base):
     mot_de_passe = Column(String)
     actif = Column(Boolean, default=True)
     resident = relationship("Resident", back_populates="familles")
-    rendez_vous = relationship("RendezVous", back_populates="famille")
+    # passive_deletes : les RDV sont supprimés en masse avant la famille,
+    # inutile que le flush les recharge pour mettre famille_id à NULL
+    rendez_vous = relationship("RendezVous", back_populates="famille", passive_deletes=True)
+
+    __table_args__ = (
+        # Recherche insensible à la casse (activate / delete-by-email) :
+        # l'index simple sur email ne sert pas pour lower(email)
+        Index('ix_familles_email_lower', func.lower(email)),
+    )
 
 
 class RendezVous(Base):
@@ -81,6 +136,13 @@ class RendezVous(Base):
     resident = relationship("Resident", back_populates="rendez_vous")
     famille = relationship("Famille", back_populates="rendez_vous")
 
+    __table_args__ = (
+        # Créneaux pris (get_disponibilites) : filtre sur statut, tri par date
+        Index('ix_rdv_statut_date', 'statut', 'date_rdv'),
+        # RDV d'une famille (get_rdv) : filtre famille + statut, tri par date
+        Index('ix_rdv_famille_statut_date', 'famille_id', 'statut', 'date_rdv'),
+    )
+
 
 class Disponibilite(Base):
     """Disponibilités de l'animatrice"""
@@ -96,35 +158,157 @@ class Disponibilite(Base):
 # Créer les tables
 Base.metadata.create_all(bind=engine)
 
+# Requêtes fréquentes construites une seule fois : la forme compilée est
+# réutilisée via le cache de requêtes du dialecte, seuls les paramètres changent
+_STMT_LOGIN = select(
+    Famille.id,
+    Famille.nom,
+    Famille.prenom,
+    Famille.email,
+    Famille.mot_de_passe,
+    Resident.id.label('resident_id'),
+    Resident.nom.label('resident_nom'),
+    Resident.prenom.label('resident_prenom'),
+    Resident.chambre.label('resident_chambre')
+).join(Resident, Resident.id == Famille.resident_id).where(
+    Famille.email == bindparam('email'),
+    Famille.actif == True
+).limit(1)
+
+_STMT_RESIDENT_BY_CODE = select(
+    Resident.id,
+    Resident.nom,
+    Resident.prenom,
+    Resident.chambre
+).where(
+    Resident.code_acces == bindparam('code'),
+    Resident.actif == True
+).limit(1)
+
+_STMT_RESIDENT_BY_ID = select(
+    Resident.id,
+    Resident.nom,
+    Resident.prenom,
+    Resident.chambre,
+    Resident.code_acces,
+    Resident.actif
+).where(Resident.id == bindparam('resident_id'))
+
+# Lecture seule : colonnes brutes (Core), sans objets ORM
+_STMT_RDV_BY_FAMILLE = select(
+    RendezVous.id,
+    RendezVous.date_rdv,
+    RendezVous.duree_minutes,
+    RendezVous.statut,
+    RendezVous.lien_jitsi
+).where(
+    RendezVous.famille_id == bindparam('famille_id'),
+    RendezVous.statut.in_(['Planifié', 'Confirmé', 'En attente'])
+).order_by(RendezVous.date_rdv)
+
+_STMT_CRENEAUX_PRIS = select(RendezVous.date_rdv).where(
+    RendezVous.statut.in_(['En attente', 'Planifié', 'Confirmé']),
+    RendezVous.date_rdv >= bindparam('now')
+)
+
+# Synchronisation des disponibilités : remplacement complet (DELETE + INSERT executemany)
+_STMT_DELETE_DISPOS = delete(Disponibilite)
+_STMT_INSERT_DISPO = insert(Disponibilite)
+
 # Flask app
 app = Flask(__name__)
 CORS(app)
 
+# Compression des réponses JSON (brotli si le client l'accepte, sinon gzip)
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+app.config['COMPRESS_BR_LEVEL'] = 4
+app.config['COMPRESS_MIN_SIZE'] = 500
+# Ne pas bufferiser les réponses en flux (export admin) pour les compresser
+app.config['COMPRESS_STREAMS'] = False
+Compress(app)
+
 PORT = int(os.getenv('PORT', 5000))
+JITSI_ROOM_PREFIX = 'https://meet.jit.si/ehpad-crecy-'
+# Jeton exigé (en-tête X-Admin-Token) par les routes admin qui exposent ou modifient
+# des données en masse ; sans ADMIN_TOKEN dans l'environnement, ces routes sont désactivées
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+
+
+@app.teardown_appcontext
+def remove_session(exc=None):
+    """Ferme la session de la requête et rend la connexion au pool"""
+    SessionLocal.remove()
+
+
+def ojsonify(data, status=200):
+    """Réponse JSON sérialisée avec orjson (remplace jsonify)"""
+    return app.response_class(orjson.dumps(data), status=status, mimetype='application/json')
+
+
+def ojsonify_conditional(data):
+    """Réponse JSON avec ETag : renvoie 304 sans corps si le client a déjà ce contenu"""
+    response = ojsonify(data)
+    response.add_etag()
+    etag, _ = response.get_etag()
+    # Flask-Compress 1.14 renvoie l'ETag suffixé ("<sha1>:br" / ":gzip") sans réévaluer
+    # la requête : le client le renvoie tel quel, on accepte donc aussi ces variantes
+    candidates = [etag] + [f'{etag}:{algo}' for algo in app.config['COMPRESS_ALGORITHM']]
+    matched = next((tag for tag in candidates if request.if_none_match.contains(tag)), None)
+    if matched is None:
+        return response
+    not_modified = app.response_class(status=304)
+    not_modified.set_etag(matched)
+    return not_modified
+
+
+def _admin_refuse():
+    """Retourne une réponse 403 si le jeton admin est absent ou invalide, sinon None"""
+    token = request.headers.get('X-Admin-Token', '')
+    if not ADMIN_TOKEN or not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        return ojsonify({'success': False, 'message': 'Accès refusé'}), 403
+    return None
+
+
+def _json_body():
+    """Décode le corps JSON de la requête avec orjson (remplace request.json)"""
+    body = request.get_data()
+    if not body:
+        return {}
+    try:
+        return orjson.loads(body)
+    except orjson.JSONDecodeError:
+        abort(400)
+
+
+# Réponses statiques sérialisées une seule fois au démarrage
+_HOME_BODY = orjson.dumps({
+    'name': 'API Mely - Portail Familles',
+    'version': '1.0.0',
+    'status': 'online',
+    'endpoints': {
+        'login': 'POST /api/login',
+        'rdv': 'GET /api/rdv/<famille_id>',
+        'request': 'POST /api/rdv/request',
+        'cancel': 'POST /api/rdv/<rdv_id>/cancel',
+        'disponibilites': 'GET /api/disponibilites',
+        'health': 'GET /api/health'
+    }
+})
+_HEALTH_BODY = orjson.dumps({'status': 'ok', 'message': 'API Mely opérationnelle'})
 
 
 @app.route('/')
 def home():
     """Page d'accueil de l'API"""
-    return jsonify({
-        'name': 'API Mely - Portail Familles',
-        'version': '1.0.0',
-        'status': 'online',
-        'endpoints': {
-            'login': 'POST /api/login',
-            'rdv': 'GET /api/rdv/<famille_id>',
-            'request': 'POST /api/rdv/request',
-            'cancel': 'POST /api/rdv/<rdv_id>/cancel',
-            'disponibilites': 'GET /api/disponibilites',
-            'health': 'GET /api/health'
-        }
-    })
+    response = app.response_class(_HOME_BODY, mimetype='application/json')
+    response.headers['Cache-Control'] = 'public, max-age=60'
+    return response
 
 
 @app.route('/api/health', methods=['GET'])
 def health():
     """Vérification de l'état du serveur"""
-    return jsonify({'status': 'ok', 'message': 'API Mely opérationnelle'})
+    return app.response_class(_HEALTH_BODY, mimetype='application/json')
 
 
 @app.route('/api/residents', methods=['GET'])
@@ -132,23 +316,17 @@ def get_residents():
     """Récupère la liste des résidents actifs"""
     db = SessionLocal()
     try:
-        residents = db.query(Resident).filter(Resident.actif == True).order_by(Resident.nom, Resident.prenom).all()
-        return jsonify({
+        residents = db.execute(
+            select(Resident.id, Resident.nom, Resident.prenom, Resident.chambre)
+            .where(Resident.actif == True)
+            .order_by(Resident.nom, Resident.prenom)
+        ).mappings().all()
+        return ojsonify_conditional({
             'success': True,
-            'residents': [
-                {
-                    'id': r.id,
-                    'nom': r.nom,
-                    'prenom': r.prenom,
-                    'chambre': r.chambre
-                }
-                for r in residents
-            ]
+            'residents': [dict(r) for r in residents]
         })
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
-    finally:
-        db.close()
+        return ojsonify({'success': False, 'error': str(e)}), 500
 
 
 @app.route('/api/residents/<int:resident_id>', methods=['GET'])
@@ -156,70 +334,51 @@ def get_resident(resident_id):
     """Récupère un résident par son ID"""
     db = SessionLocal()
     try:
-        resident = db.query(Resident).filter(Resident.id == resident_id).first()
+        resident = db.execute(_STMT_RESIDENT_BY_ID, {'resident_id': resident_id}).mappings().first()
         
         if not resident:
-            return jsonify({'success': False, 'error': 'Résident non trouvé'}), 404
+            return ojsonify({'success': False, 'error': 'Résident non trouvé'}), 404
         
-        return jsonify({
+        return ojsonify({
             'success': True,
-            'resident': {
-                'id': resident.id,
-                'nom': resident.nom,
-                'prenom': resident.prenom,
-                'chambre': resident.chambre,
-                'code_acces': resident.code_acces,
-                'actif': resident.actif
-            }
+            'resident': dict(resident)
         })
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
-    finally:
-        db.close()
+        return ojsonify({'success': False, 'error': str(e)}), 500
 
 
 @app.route('/api/residents/verify-code', methods=['POST'])
 def verify_code():
     """Vérifie un code d'accès et retourne les infos du résident"""
-    data = request.json
+    data = _json_body()
     code = data.get('code', '').strip().upper()
     
     if not code:
-        return jsonify({'success': False, 'error': 'Code requis'}), 400
+        return ojsonify({'success': False, 'error': 'Code requis'}), 400
     
     db = SessionLocal()
     try:
         # Chercher le résident avec ce code
-        resident = db.query(Resident).filter(
-            Resident.code_acces == code,
-            Resident.actif == True
-        ).first()
+        resident = db.execute(_STMT_RESIDENT_BY_CODE, {'code': code}).mappings().first()
         
         if resident:
-            return jsonify({
+            return ojsonify({
                 'success': True,
-                'resident': {
-                    'id': resident.id,
-                    'nom': resident.nom,
-                    'prenom': resident.prenom,
-                    'chambre': resident.chambre
-                }
+                'resident': dict(resident)
             })
         else:
-            return jsonify({
+            return ojsonify({
                 'success': False,
                 'error': 'Code invalide ou résident inactif'
             }), 404
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
-    finally:
-        db.close()
+        return ojsonify({'success': False, 'error': str(e)}), 500
 
 
 @app.route('/api/residents/sync', methods=['POST'])
 def sync_resident():
     """Ajoute ou met à jour un résident (pour la synchronisation)"""
-    data = request.json
+    data = _json_body()
     db = SessionLocal()
     try:
         # Vérifier si le résident existe déjà
@@ -247,7 +406,7 @@ def sync_resident():
             action = 'created'
         
         db.commit()
-        return jsonify({
+        return ojsonify({
             'success': True,
             'action': action,
             'resident': {
@@ -259,9 +418,59 @@ def sync_resident():
         })
     except Exception as e:
         db.rollback()
-        return jsonify({'success': False, 'error': str(e)}), 500
-    finally:
-        db.close()
+        return ojsonify({'success': False, 'error': str(e)}), 500
+
+
+@app.route('/api/residents/sync-bulk', methods=['POST'])
+def sync_residents_bulk():
+    """Ajoute ou met à jour une liste de résidents en une seule transaction"""
+    data = _json_body()
+    items = data.get('residents') or []
+
+    if not items:
+        return ojsonify({'success': False, 'error': 'Liste de résidents requise'}), 400
+
+    db = SessionLocal()
+    try:
+        # Charger en une seule requête les résidents déjà présents
+        keys = list({(item.get('nom'), item.get('prenom')) for item in items})
+        existing = {
+            (r.nom, r.prenom): r
+            for r in db.query(Resident).filter(tuple_(Resident.nom, Resident.prenom).in_(keys))
+        }
+
+        created = 0
+        updated = 0
+        for item in items:
+            key = (item.get('nom'), item.get('prenom'))
+            resident = existing.get(key)
+            if resident:
+                resident.chambre = item.get('chambre')
+                resident.code_acces = item.get('code_acces')
+                resident.actif = item.get('actif', True)
+                updated += 1
+            else:
+                resident = Resident(
+                    nom=item.get('nom'),
+                    prenom=item.get('prenom'),
+                    chambre=item.get('chambre'),
+                    code_acces=item.get('code_acces'),
+                    actif=item.get('actif', True)
+                )
+                db.add(resident)
+                existing[key] = resident
+                created += 1
+
+        # Les INSERT sont regroupés au flush (execute_values avec psycopg2)
+        db.commit()
+        return ojsonify({
+            'success': True,
+            'created': created,
+            'updated': updated
+        })
+    except Exception as e:
+        db.rollback()
+        return ojsonify({'success': False, 'error': str(e)}), 500
 
 
 @app.route('/api/residents/<int:resident_id>/delete', methods=['POST'])
@@ -269,31 +478,35 @@ def delete_resident(resident_id):
     """Désactive un résident (soft delete)"""
     db = SessionLocal()
     try:
-        resident = db.query(Resident).get(resident_id)
-        if resident:
-            resident.actif = False
+        # UPDATE direct, sans charger le résident au préalable
+        result = db.execute(
+            update(Resident)
+            .where(Resident.id == resident_id)
+            .values(actif=False)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
             db.commit()
-            return jsonify({'success': True, 'message': 'Résident désactivé'})
+            return ojsonify({'success': True, 'message': 'Résident désactivé'})
         else:
-            return jsonify({'success': False, 'error': 'Résident non trouvé'}), 404
+            db.rollback()
+            return ojsonify({'success': False, 'error': 'Résident non trouvé'}), 404
     except Exception as e:
         db.rollback()
-        return jsonify({'success': False, 'error': str(e)}), 500
-    finally:
-        db.close()
+        return ojsonify({'success': False, 'error': str(e)}), 500
 
 
 @app.route('/api/register', methods=['POST'])
 def register():
     """Inscription d'une nouvelle famille"""
-    data = request.json
+    data = _json_body()
     
     db = SessionLocal()
     try:
         # Vérifier si l'email existe déjà
         existing = db.query(Famille).filter(Famille.email == data.get('email')).first()
         if existing:
-            return jsonify({'success': False, 'message': 'Cet email est déjà utilisé'}), 400
+            return ojsonify({'success': False, 'message': 'Cet email est déjà utilisé'}), 400
         
         # Créer la nouvelle famille
         nouvelle_famille = Famille(
@@ -310,131 +523,115 @@ def register():
         db.add(nouvelle_famille)
         db.commit()
         
-        print(f"✅ Nouvelle inscription : {nouvelle_famille.prenom} {nouvelle_famille.nom} ({nouvelle_famille.email})")
+        logger.info("Nouvelle inscription : %s %s (%s)", nouvelle_famille.prenom, nouvelle_famille.nom, nouvelle_famille.email)
         
-        return jsonify({
+        return ojsonify({
             'success': True,
             'message': 'Inscription réussie ! Votre compte sera activé par l\'équipe de l\'EHPAD.'
         })
     
     except Exception as e:
         db.rollback()
-        print(f"❌ Erreur inscription : {e}")
-        return jsonify({'success': False, 'message': f'Erreur: {str(e)}'}), 500
-    
-    finally:
-        db.close()
+        logger.error("Erreur inscription : %s", e)
+        return ojsonify({'success': False, 'message': f'Erreur: {str(e)}'}), 500
 
 
 @app.route('/api/familles', methods=['GET'])
 def get_familles():
-    """Récupère toutes les familles (pour synchronisation)"""
+    """Récupère les familles (pour synchronisation), paginées si limit est fourni"""
+    limit = request.args.get('limit', type=int)
+    offset = request.args.get('offset', 0, type=int)
+    
     db = SessionLocal()
     try:
-        familles = db.query(Famille).all()
-        
-        familles_list = []
-        for famille in familles:
-            familles_list.append({
-                'id': famille.id,
-                'resident_id': famille.resident_id,
-                'nom': famille.nom,
-                'prenom': famille.prenom,
-                'lien_parente': famille.lien_parente,
-                'email': famille.email,
-                'telephone': famille.telephone,
-                'mot_de_passe': famille.mot_de_passe,
-                'actif': famille.actif
-            })
+        stmt = select(
+            Famille.id,
+            Famille.resident_id,
+            Famille.nom,
+            Famille.prenom,
+            Famille.lien_parente,
+            Famille.email,
+            Famille.telephone,
+            Famille.mot_de_passe,
+            Famille.actif
+        ).order_by(Famille.id)  # ordre stable d'une page à l'autre
+        if limit is not None:
+            stmt = stmt.limit(max(limit, 0)).offset(max(offset, 0))
+        
+        familles = db.execute(stmt).mappings().all()
         
-        return jsonify({
+        return ojsonify({
             'success': True,
-            'familles': familles_list
+            'familles': [dict(f) for f in familles]
         })
     
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
-    
-    finally:
-        db.close()
+        return ojsonify({'success': False, 'error': str(e)}), 500
 
 
 @app.route('/api/login', methods=['POST'])
 def login():
     """Authentification d'une famille"""
-    data = request.json
+    data = _json_body()
     email = data.get('email')
     code = data.get('code')
     
     db = SessionLocal()
-    try:
-        # Chercher la famille par email
-        famille = db.query(Famille).filter(
-            Famille.email == email,
-            Famille.actif == True
-        ).first()
-        
-        if not famille:
-            return jsonify({'success': False, 'message': 'Email non trouvé'}), 401
-        
-        # Vérifier le mot de passe
-        if not code or code != famille.mot_de_passe:
-            return jsonify({'success': False, 'message': 'Mot de passe incorrect'}), 401
-        
-        # Récupérer le résident
-        resident = db.query(Resident).get(famille.resident_id)
-        
-        return jsonify({
-            'success': True,
-            'famille': {
-                'id': famille.id,
-                'nom': famille.nom,
-                'prenom': famille.prenom,
-                'email': famille.email
-            },
-            'resident': {
-                'id': resident.id,
-                'nom': resident.nom,
-                'prenom': resident.prenom,
-                'chambre': resident.chambre
-            }
-        })
+    # Chercher la famille par email (colonnes du résident dans la même requête)
+    famille = db.execute(_STMT_LOGIN, {'email': email}).mappings().first()
+    
+    if not famille:
+        return ojsonify({'success': False, 'message': 'Email non trouvé'}), 401
+    
+    # Vérifier le mot de passe (comparaison en temps constant)
+    if not isinstance(code, str) or not code or not hmac.compare_digest(
+        code.encode(), (famille['mot_de_passe'] or '').encode()
+    ):
+        return ojsonify({'success': False, 'message': 'Mot de passe incorrect'}), 401
     
-    finally:
-        db.close()
+    return ojsonify({
+        'success': True,
+        'famille': {
+            'id': famille['id'],
+            'nom': famille['nom'],
+            'prenom': famille['prenom'],
+            'email': famille['email']
+        },
+        'resident': {
+            'id': famille['resident_id'],
+            'nom': famille['resident_nom'],
+            'prenom': famille['resident_prenom'],
+            'chambre': famille['resident_chambre']
+        }
+    })
 
 
 @app.route('/api/rdv/<int:famille_id>', methods=['GET'])
 def get_rdv(famille_id):
     """Récupère les RDV d'une famille"""
     db = SessionLocal()
-    try:
-        rdvs = db.query(RendezVous).filter(
-            RendezVous.famille_id == famille_id,
-            RendezVous.statut.in_(['Planifié', 'Confirmé', 'En attente'])
-        ).order_by(RendezVous.date_rdv).all()
-        
-        rdv_list = []
-        for rdv in rdvs:
-            rdv_list.append({
-                'id': rdv.id,
-                'date': rdv.date_rdv.strftime('%Y-%m-%d'),
-                'heure': rdv.date_rdv.strftime('%H:%M'),
-                'duree': rdv.duree_minutes,
-                'statut': rdv.statut,
-                'lien': rdv.lien_jitsi
-            })
-        
-        return jsonify({'success': True, 'rdvs': rdv_list})
+    rdvs = db.execute(_STMT_RDV_BY_FAMILLE, {'famille_id': famille_id}).mappings().all()
+
+    rdv_list = []
+    for rdv in rdvs:
+        # Un seul isoformat (C) au lieu de deux strftime : 'YYYY-MM-DD HH:MM'
+        date_iso = rdv['date_rdv'].isoformat(' ', 'minutes')
+        rdv_list.append({
+            'id': rdv['id'],
+            'date': date_iso[:10],
+            'heure': date_iso[11:],
+            'duree': rdv['duree_minutes'],
+            'statut': rdv['statut'],
+            'lien': rdv['lien_jitsi']
+        })
     
-    finally:
-        db.close()
+    return ojsonify_conditional({'success': True, 'rdvs': rdv_list})
 
 
 @app.route('/api/rdv/request', methods=['POST'])
 def request_rdv():
     """Crée une demande de RDV"""
-    data = request.json
+    data = _json_body()
     
     db = SessionLocal()
     try:
@@ -449,9 +646,10 @@ def request_rdv():
         # Créer la date/heure
         date_rdv = datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %H:%M")
         
-        # Générer un lien Jitsi unique
-        room_id = secrets.token_urlsafe(16)
-        jitsi_link = f"https://meet.jit.si/ehpad-crecy-{room_id}"
+        # Générer un lien Jitsi unique (le nom de salle est le seul contrôle d'accès,
+        # il doit rester imprévisible : secrets plutôt que uuid4, par ailleurs plus lent).
+        # Le lien est stocké une fois pour toutes dans lien_jitsi : ne jamais le recalculer
+        jitsi_link = JITSI_ROOM_PREFIX + secrets.token_urlsafe(16)
         
         # Créer la demande de RDV avec statut "En attente"
         rdv = RendezVous(
@@ -468,10 +666,9 @@ def request_rdv():
         db.add(rdv)
         db.commit()
         
-        print(f"📝 Nouvelle demande de RDV créée : #{rdv.id}")
-        print(f"🔗 Lien Jitsi généré : {jitsi_link}")
+        logger.info("Nouvelle demande de RDV créée : #%s (lien Jitsi : %s)", rdv.id, jitsi_link)
         
-        return jsonify({
+        return ojsonify({
             'success': True,
             'message': 'Demande envoyée avec succès',
             'rdv_id': rdv.id,
@@ -480,14 +677,11 @@ def request_rdv():
     
     except Exception as e:
         db.rollback()
-        print(f"❌ Erreur : {e}")
-        return jsonify({
+        logger.error("Erreur request_rdv: %s", e)
+        return ojsonify({
             'success': False,
             'message': f'Erreur : {str(e)}'
         }), 500
-    
-    finally:
-        db.close()
 
 
 @app.route('/api/rdv/<int:rdv_id>/cancel', methods=['POST'])
@@ -495,24 +689,115 @@ def cancel_rdv(rdv_id):
     """Annule un RDV"""
     db = SessionLocal()
     try:
-        rdv = db.query(RendezVous).get(rdv_id)
+        # UPDATE direct, sans charger le RDV au préalable
+        result = db.execute(
+            update(RendezVous)
+            .where(RendezVous.id == rdv_id)
+            .values(statut="Annulé")
+            .execution_options(synchronize_session=False)
+        )
         
-        if not rdv:
-            return jsonify({'success': False, 'message': 'RDV non trouvé'}), 404
+        if result.rowcount == 0:
+            db.rollback()
+            return ojsonify({'success': False, 'message': 'RDV non trouvé'}), 404
         
-        rdv.statut = "Annulé"
         db.commit()
         
-        print(f"❌ RDV #{rdv_id} annulé")
+        logger.info("RDV #%s annulé", rdv_id)
         
-        return jsonify({'success': True, 'message': 'RDV annulé'})
+        return ojsonify({'success': True, 'message': 'RDV annulé'})
     
     except Exception as e:
         db.rollback()
-        return jsonify({'success': False, 'message': str(e)}), 500
+        return ojsonify({'success': False, 'message': str(e)}), 500
+
+
+# Taille maximale d'une annulation groupée
+BULK_CANCEL_MAX_IDS = 500
+
+
+@app.route('/api/rdv/bulk-cancel', methods=['POST'])
+def bulk_cancel_rdv():
+    """Annule une liste de RDV en une seule requête UPDATE (administration)"""
+    refus = _admin_refuse()
+    if refus:
+        return refus
     
-    finally:
-        db.close()
+    data = _json_body()
+    ids = data.get('ids') or []
+    
+    # bool est une sous-classe de int : true serait pris pour l'identifiant 1
+    if not ids or not isinstance(ids, list) or not all(
+        isinstance(rdv_id, int) and not isinstance(rdv_id, bool) for rdv_id in ids
+    ):
+        return ojsonify({'success': False, 'message': 'Liste d\'identifiants requise'}), 400
+    
+    if len(ids) > BULK_CANCEL_MAX_IDS:
+        return ojsonify({
+            'success': False,
+            'message': f'{BULK_CANCEL_MAX_IDS} identifiants maximum par requête'
+        }), 400
+    
+    db = SessionLocal()
+    try:
+        result = db.execute(
+            update(RendezVous)
+            .where(RendezVous.id.in_(ids))
+            .values(statut="Annulé")
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        
+        logger.info("%s RDV annulé(s)", result.rowcount)
+        
+        return ojsonify({
+            'success': True,
+            'message': f'{result.rowcount} RDV annulé(s)',
+            'count': result.rowcount
+        })
+    
+    except Exception as e:
+        db.rollback()
+        return ojsonify({'success': False, 'message': str(e)}), 500
+
+
+# Cache mémoire des disponibilités : elles changent rarement (planning hebdomadaire)
+DISPO_CACHE_TTL = 60  # secondes
+# generation : incrémentée à chaque invalidation, pour ne pas remettre en cache une
+# lecture commencée avant (sous gevent, le SELECT cède la main à d'autres requêtes)
+_dispo_cache = {'expires': 0.0, 'rows': None, 'generation': 0}
+
+
+def _get_disponibilites_cached(db):
+    """Retourne les disponibilités actives, relues en base au plus toutes les DISPO_CACHE_TTL secondes"""
+    now = time.monotonic()
+    if _dispo_cache['rows'] is None or now >= _dispo_cache['expires']:
+        generation = _dispo_cache['generation']
+        rows = db.execute(
+            select(
+                Disponibilite.id,
+                Disponibilite.jour_semaine,
+                Disponibilite.heure_debut,
+                Disponibilite.heure_fin,
+                Disponibilite.type
+            ).where(
+                Disponibilite.actif == True,
+                Disponibilite.type == "Disponible"
+            ).order_by(Disponibilite.jour_semaine, Disponibilite.heure_debut)
+        ).mappings().all()
+        rows = [dict(row) for row in rows]
+        if _dispo_cache['generation'] != generation:
+            # Invalidé pendant la lecture : réponse servie sans mise en cache
+            return rows
+        _dispo_cache['rows'] = rows
+        _dispo_cache['expires'] = now + DISPO_CACHE_TTL
+    return _dispo_cache['rows']
+
+
+def _invalidate_disponibilites_cache():
+    """Force la relecture des disponibilités au prochain appel"""
+    _dispo_cache['generation'] += 1
+    _dispo_cache['rows'] = None
 
 
 @app.route('/api/disponibilites', methods=['GET'])
@@ -520,48 +805,78 @@ def get_disponibilites():
     """Récupère les disponibilités de l'animatrice avec les créneaux déjà demandés"""
     db = SessionLocal()
     try:
-        # Récupérer toutes les disponibilités actives de type "Disponible"
-        dispos = db.query(Disponibilite).filter(
-            Disponibilite.actif == True,
-            Disponibilite.type == "Disponible"
-        ).order_by(Disponibilite.jour_semaine, Disponibilite.heure_debut).all()
-        
-        # Récupérer tous les RDV en attente ou confirmés
-        rdvs = db.query(RendezVous).filter(
-            RendezVous.statut.in_(['En attente', 'Planifié', 'Confirmé'])
-        ).all()
-        
+        # Disponibilités actives de type "Disponible" (cache mémoire)
+        disponibilites = _get_disponibilites_cached(db)
+
+        # Récupérer uniquement les dates des RDV à venir en attente ou confirmés
+        # (les créneaux passés ne sont plus réservables, inutile de les envoyer)
+        rows = db.execute(_STMT_CRENEAUX_PRIS, {'now': datetime.now()}).all()
+
         # Créer un set des créneaux déjà pris (date + heure)
-        creneaux_pris = set()
-        for rdv in rdvs:
-            creneau_key = f"{rdv.date_rdv.strftime('%Y-%m-%d')}_{rdv.date_rdv.strftime('%H:%M')}"
-            creneaux_pris.add(creneau_key)
-        
-        disponibilites = []
-        for dispo in dispos:
-            disponibilites.append({
-                'id': dispo.id,
-                'jour_semaine': dispo.jour_semaine,
-                'heure_debut': dispo.heure_debut,
-                'heure_fin': dispo.heure_fin,
-                'type': dispo.type
-            })
+        creneaux_pris = {date_rdv.isoformat('_', 'minutes') for (date_rdv,) in rows}
         
-        return jsonify({
+        # Liste triée : contenu identique => corps identique => même ETag
+        return ojsonify_conditional({
             'success': True,
             'disponibilites': disponibilites,
-            'creneaux_pris': list(creneaux_pris)
+            'creneaux_pris': sorted(creneaux_pris)
         })
     
     except Exception as e:
-        print(f"❌ Erreur get_disponibilites: {e}")
-        return jsonify({
+        logger.error("Erreur get_disponibilites: %s", e)
+        return ojsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+
+
+@app.route('/api/disponibilites/sync', methods=['POST'])
+def sync_disponibilites():
+    """Remplace les disponibilités de l'animatrice (pour la synchronisation)"""
+    # Remplacement complet de la table : réservé à l'administration
+    refus = _admin_refuse()
+    if refus:
+        return refus
+
+    data = _json_body()
+    items = data.get('disponibilites')
+
+    # Clé absente ou mal formée : ne surtout pas vider le planning
+    if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+        return ojsonify({'success': False, 'message': 'Liste de disponibilités requise'}), 400
+
+    db = SessionLocal()
+    try:
+        rows = [
+            {
+                'jour_semaine': item.get('jour_semaine'),
+                'heure_debut': item.get('heure_debut'),
+                'heure_fin': item.get('heure_fin'),
+                'type': item.get('type', 'Disponible'),
+                'actif': item.get('actif', True)
+            }
+            for item in items
+        ]
+
+        # DELETE + un seul INSERT executemany dans la même transaction
+        db.execute(_STMT_DELETE_DISPOS)
+        if rows:
+            db.execute(_STMT_INSERT_DISPO, rows)
+        db.commit()
+        _invalidate_disponibilites_cache()
+
+        return ojsonify({
+            'success': True,
+            'message': f'{len(items)} disponibilité(s) synchronisée(s)'
+        })
+
+    except Exception as e:
+        db.rollback()
+        logger.error("Erreur sync_disponibilites: %s", e)
+        return ojsonify({
             'success': False,
             'message': str(e)
         }), 500
-    
-    finally:
-        db.close()
 
 
 @app.route('/api/famille/<int:famille_id>/delete', methods=['POST'])
@@ -569,59 +884,96 @@ def delete_famille(famille_id):
     """Supprime (désactive) une famille"""
     db = SessionLocal()
     try:
-        famille = db.query(Famille).get(famille_id)
+        # Soft delete : désactiver au lieu de supprimer, en un seul UPDATE
+        result = db.execute(
+            update(Famille)
+            .where(Famille.id == famille_id)
+            .values(actif=False)
+            .execution_options(synchronize_session=False)
+        )
         
-        if not famille:
-            return jsonify({'success': False, 'message': 'Famille non trouvée'}), 404
+        if result.rowcount == 0:
+            db.rollback()
+            return ojsonify({'success': False, 'message': 'Famille non trouvée'}), 404
         
-        # Soft delete : désactiver au lieu de supprimer
-        famille.actif = False
         db.commit()
         
-        print(f"🗑️ Famille #{famille_id} désactivée")
+        logger.info("Famille #%s désactivée", famille_id)
         
-        return jsonify({'success': True, 'message': 'Famille supprimée'})
+        return ojsonify({'success': True, 'message': 'Famille supprimée'})
     
     except Exception as e:
         db.rollback()
-        print(f"❌ Erreur delete_famille: {e}")
-        return jsonify({'success': False, 'message': str(e)}), 500
-    
-    finally:
-        db.close()
+        logger.error("Erreur delete_famille: %s", e)
+        return ojsonify({'success': False, 'message': str(e)}), 500
+
+
+# Migration code_acces : DDL idempotent (PostgreSQL 9.6+), une seule instruction
+# par étape et sans course entre deux appels simultanés
+_SQL_ADD_CODE_ACCES = text("ALTER TABLE residents ADD COLUMN IF NOT EXISTS code_acces VARCHAR")
+_SQL_INDEX_CODE_ACCES = text(
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_residents_code_acces ON residents (code_acces)"
+)
+
+# Index sur lower(email) pour les tables familles déjà existantes
+_SQL_INDEX_EMAIL_LOWER = text(
+    "CREATE INDEX IF NOT EXISTS ix_familles_email_lower ON familles (lower(email))"
+)
 
 
 @app.route('/api/admin/migrate-add-code-acces', methods=['POST'])
 def migrate_add_code_acces():
     """Route admin pour ajouter la colonne code_acces"""
     try:
-        with engine.begin() as conn:  # begin() au lieu de connect() pour auto-commit
-            # Vérifier si la colonne existe déjà
-            result = conn.execute(text("""
-                SELECT column_name 
-                FROM information_schema.columns 
-                WHERE table_name='residents' AND column_name='code_acces'
-            """))
-            
-            if result.fetchone():
-                return jsonify({
-                    'success': True,
-                    'message': 'La colonne code_acces existe déjà'
-                })
-            else:
-                # Ajouter la colonne
-                conn.execute(text("ALTER TABLE residents ADD COLUMN code_acces VARCHAR UNIQUE"))
-                return jsonify({
-                    'success': True,
-                    'message': 'Colonne code_acces ajoutée avec succès'
-                })
+        with engine.begin() as conn:
+            conn.execute(_SQL_ADD_CODE_ACCES)
+            conn.execute(_SQL_INDEX_CODE_ACCES)
+        return ojsonify({
+            'success': True,
+            'message': 'Colonne code_acces présente'
+        })
     except Exception as e:
-        return jsonify({
+        return ojsonify({
             'success': False,
             'message': f'Erreur: {str(e)}'
         }), 500
 
 
+@app.route('/api/admin/export-rdv', methods=['GET'])
+def export_rdv():
+    """Route admin pour exporter tous les rendez-vous (réponse JSON en flux)"""
+    # L'export contient les notes et tous les liens Jitsi (seul contrôle d'accès aux salles)
+    refus = _admin_refuse()
+    if refus:
+        return refus
+
+    # stream_results + yield_per : lecture par paquets de 1000 lignes côté serveur,
+    # la mémoire reste constante quelle que soit la taille de la table
+    stmt = select(
+        RendezVous.id,
+        RendezVous.resident_id,
+        RendezVous.famille_id,
+        RendezVous.date_rdv,
+        RendezVous.duree_minutes,
+        RendezVous.statut,
+        RendezVous.notes_avant,
+        RendezVous.lien_jitsi,
+        RendezVous.rappel_envoye,
+        RendezVous.created_at
+    ).order_by(RendezVous.id).execution_options(stream_results=True, yield_per=1000)
+
+    def generate():
+        db = SessionLocal()
+        yield b'{"success":true,"rdvs":['
+        separator = b''
+        for row in db.execute(stmt).mappings():
+            yield separator + orjson.dumps(dict(row))
+            separator = b','
+        yield b']}'
+
+    return app.response_class(stream_with_context(generate()), mimetype='application/json')
+
+
 @app.route('/api/admin/fix-sequences', methods=['POST'])
 def fix_sequences():
     """Route admin pour réinitialiser les séquences PostgreSQL"""
@@ -637,12 +989,12 @@ def fix_sequences():
                 SELECT setval('residents_id_seq', COALESCE((SELECT MAX(id) FROM residents), 0) + 1, false);
             """))
             
-            return jsonify({
+            return ojsonify({
                 'success': True,
                 'message': 'Séquences réinitialisées avec succès'
             })
     except Exception as e:
-        return jsonify({
+        return ojsonify({
             'success': False,
             'message': f'Erreur: {str(e)}'
         }), 500
@@ -651,19 +1003,21 @@ def fix_sequences():
 @app.route('/api/familles/delete-by-email', methods=['POST'])
 def delete_famille_by_email():
     """Supprime une famille par son email"""
-    data = request.json
+    data = _json_body()
     email = data.get('email', '').strip().lower()
     
     if not email:
-        return jsonify({'success': False, 'error': 'Email requis'}), 400
+        return ojsonify({'success': False, 'error': 'Email requis'}), 400
     
     db = SessionLocal()
     try:
-        # Trouver la famille
-        famille = db.query(Famille).filter(func.lower(Famille.email) == email).first()
+        # Trouver la famille (raiseload : aucune relation ne doit être chargée ici)
+        famille = db.query(Famille).options(raiseload('*')).filter(
+            func.lower(Famille.email) == email
+        ).first()
         
         if not famille:
-            return jsonify({'success': False, 'error': 'Famille non trouvée'}), 404
+            return ojsonify({'success': False, 'error': 'Famille non trouvée'}), 404
         
         # Supprimer les rendez-vous associés
         db.query(RendezVous).filter(RendezVous.famille_id == famille.id).delete()
@@ -672,49 +1026,47 @@ def delete_famille_by_email():
         db.delete(famille)
         db.commit()
         
-        return jsonify({
+        return ojsonify({
             'success': True,
             'message': f'Famille {famille.prenom} {famille.nom} supprimée'
         })
     
     except Exception as e:
         db.rollback()
-        return jsonify({'success': False, 'error': str(e)}), 500
-    finally:
-        db.close()
+        return ojsonify({'success': False, 'error': str(e)}), 500
 
 
 @app.route('/api/familles/activate', methods=['POST'])
 def activate_famille():
     """Active une famille par son email"""
-    data = request.json
+    data = _json_body()
     email = data.get('email', '').strip().lower()
     
     if not email:
-        return jsonify({'success': False, 'error': 'Email requis'}), 400
+        return ojsonify({'success': False, 'error': 'Email requis'}), 400
     
     db = SessionLocal()
     try:
         # Trouver la famille
-        famille = db.query(Famille).filter(func.lower(Famille.email) == email).first()
+        famille = db.query(Famille).options(raiseload('*')).filter(
+            func.lower(Famille.email) == email
+        ).first()
         
         if not famille:
-            return jsonify({'success': False, 'error': 'Famille non trouvée'}), 404
+            return ojsonify({'success': False, 'error': 'Famille non trouvée'}), 404
         
         # Activer la famille
         famille.actif = True
         db.commit()
         
-        return jsonify({
+        return ojsonify({
             'success': True,
             'message': f'Famille {famille.prenom} {famille.nom} activée'
         })
     
     except Exception as e:
         db.rollback()
-        return jsonify({'success': False, 'error': str(e)}), 500
-    finally:
-        db.close()
+        return ojsonify({'success': False, 'error': str(e)}), 500
 
 
 @app.route('/api/admin/clear-familles', methods=['POST'])
@@ -722,58 +1074,52 @@ def clear_familles():
     """Route admin pour supprimer toutes les familles (DANGER!)"""
     db = SessionLocal()
     try:
-        # Compter avant suppression
-        count_familles = db.query(Famille).count()
-        count_rdv = db.query(RendezVous).count()
-        
-        # Supprimer d'abord tous les rendez-vous
-        db.query(RendezVous).delete()
-        
-        # Puis supprimer toutes les familles
-        db.query(Famille).delete()
+        # Supprimer d'abord tous les rendez-vous, puis toutes les familles :
+        # le nombre de lignes supprimées sert directement de compteur
+        count_rdv = db.query(RendezVous).delete()
+        count_familles = db.query(Famille).delete()
         
         db.commit()
         
-        print(f"🗑️ {count_rdv} rendez-vous supprimé(s)")
-        print(f"🗑️ {count_familles} famille(s) supprimée(s)")
+        logger.info("%s rendez-vous et %s famille(s) supprimé(s)", count_rdv, count_familles)
         
-        return jsonify({
+        return ojsonify({
             'success': True,
             'message': f'{count_familles} famille(s) et {count_rdv} rendez-vous supprimé(s)'
         })
     except Exception as e:
         db.rollback()
-        print(f"❌ Erreur clear_familles: {e}")
-        return jsonify({
+        logger.error("Erreur clear_familles: %s", e)
+        return ojsonify({
             'success': False,
             'message': f'Erreur: {str(e)}'
         }), 500
-    finally:
-        db.close()
 
 
 # Migration automatique au démarrage
 def run_migrations():
     """Exécute les migrations nécessaires"""
     try:
-        with engine.connect() as conn:
-            # Vérifier si la colonne code_acces existe
-            result = conn.execute(text("""
-                SELECT column_name 
-                FROM information_schema.columns 
-                WHERE table_name='residents' AND column_name='code_acces'
-            """))
-            
-            if result.rowcount == 0:
-                # Ajouter la colonne
-                conn.execute(text("ALTER TABLE residents ADD COLUMN code_acces VARCHAR(50)"))
-                conn.commit()
-                print("✅ Migration: Colonne code_acces ajoutée")
-            else:
-                print("ℹ️ Migration: Colonne code_acces déjà présente")
-                
+        with engine.begin() as conn:
+            conn.execute(_SQL_ADD_CODE_ACCES)
+            conn.execute(_SQL_INDEX_CODE_ACCES)
+        logger.info("Migration: Colonne code_acces présente")
+    except Exception as e:
+        logger.warning("Migration ignorée: %s", e)
+
+    try:
+        # create_all n'ajoute pas les nouveaux index aux tables existantes
+        for index in RendezVous.__table__.indexes:
+            index.create(bind=engine, checkfirst=True)
+    except Exception as e:
+        logger.warning("Migration des index ignorée: %s", e)
+
+    try:
+        # Index sur expression : checkfirst ne sait pas le détecter, DDL idempotent
+        with engine.begin() as conn:
+            conn.execute(_SQL_INDEX_EMAIL_LOWER)
     except Exception as e:
-        print(f"⚠️ Migration ignorée: {e}")
+        logger.warning("Migration de l'index email ignorée: %s", e)
 
 # Exécuter les migrations au démarrage
 run_migrations()
@@ -0,0 +1,21 @@
+"""
+Configuration gunicorn pour le déploiement (Railway/Heroku/Render)
+Workers gevent : les attentes réseau (PostgreSQL) libèrent le worker pour les autres requêtes
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+worker_class = 'gevent'
+# Peu de workers : la concurrence vient de gevent (worker_connections), pas des processus.
+# cpu_count() verrait les CPU de l'hôte, pas le quota du conteneur.
+# Chaque worker a son propre pool SQLAlchemy (pool_size=10 + max_overflow=20) :
+# budget de connexions PostgreSQL = workers x 30 (60 avec la valeur par défaut)
+workers = int(os.getenv('WEB_CONCURRENCY', 2))
+worker_connections = int(os.getenv('WORKER_CONNECTIONS', 1000))
+
+
+def post_fork(server, worker):
+    """Rend les appels psycopg2 (libpq) coopératifs sous gevent"""
+    from psycogreen.gevent import patch_psycopg
+    patch_psycopg()
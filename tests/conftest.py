@@ -0,0 +1,34 @@
+"""
+Fixtures communes : application sur une base SQLite temporaire
+"""
+
+import importlib
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope='session')
+def client(tmp_path_factory):
+    """Client de test sur une base SQLite temporaire, avec une liste de résidents compressible"""
+    os.environ.pop('DATABASE_URL', None)
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp('db'))
+    try:
+        api_cloud = importlib.import_module('api_cloud')
+        client = api_cloud.app.test_client()
+        residents = [{'nom': f'Nom{i:02d}', 'prenom': 'Prenom', 'chambre': str(i)} for i in range(40)]
+        assert client.post('/api/residents/sync-bulk', json={'residents': residents}).status_code == 200
+        yield client
+    finally:
+        os.chdir(cwd)
+
+
+@pytest.fixture
+def admin_headers(client, monkeypatch):
+    """Configure un jeton admin et renvoie l'en-tête correspondant"""
+    monkeypatch.setattr(sys.modules['api_cloud'], 'ADMIN_TOKEN', 'secret')
+    return {'X-Admin-Token': 'secret'}
@@ -0,0 +1,36 @@
+"""
+Tests des réponses conditionnelles (ETag / 304) derrière Flask-Compress
+"""
+
+import pytest
+
+
+@pytest.mark.parametrize('encoding', ['br', 'gzip'])
+def test_etag_compresse_renvoie_304(client, encoding):
+    first = client.get('/api/residents', headers={'Accept-Encoding': encoding})
+    assert first.status_code == 200
+    assert first.headers['Content-Encoding'] == encoding
+
+    second = client.get('/api/residents', headers={
+        'Accept-Encoding': encoding,
+        'If-None-Match': first.headers['ETag']
+    })
+    assert second.status_code == 304
+    assert second.data == b''
+
+
+def test_etag_non_compresse_renvoie_304(client):
+    first = client.get('/api/residents')
+    assert 'Content-Encoding' not in first.headers
+
+    second = client.get('/api/residents', headers={'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 304
+
+
+def test_etag_different_renvoie_le_contenu(client):
+    response = client.get('/api/residents', headers={
+        'Accept-Encoding': 'br',
+        'If-None-Match': '"autre":br'
+    })
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'br'
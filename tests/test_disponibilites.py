@@ -0,0 +1,60 @@
+"""
+Tests de la synchronisation des disponibilités et de leur cache
+"""
+
+import sys
+
+PLANNING = [
+    {'jour_semaine': 0, 'heure_debut': '10:00', 'heure_fin': '12:00'},
+    {'jour_semaine': 2, 'heure_debut': '14:00', 'heure_fin': '16:00'},
+]
+
+
+def _jours(client):
+    return [d['jour_semaine'] for d in client.get('/api/disponibilites').get_json()['disponibilites']]
+
+
+def test_sync_exige_le_jeton_admin(client, admin_headers):
+    response = client.post('/api/disponibilites/sync', json={'disponibilites': PLANNING})
+    assert response.status_code == 403
+
+
+def test_sync_remplace_et_invalide_le_cache(client, admin_headers):
+    assert client.post('/api/disponibilites/sync', json={'disponibilites': PLANNING},
+                       headers=admin_headers).status_code == 200
+    assert _jours(client) == [0, 2]
+
+    # Le GET précédent a rempli le cache : la synchro suivante doit être visible aussitôt
+    nouveau = [{'jour_semaine': 4, 'heure_debut': '09:00', 'heure_fin': '11:00', 'actif': True}]
+    assert client.post('/api/disponibilites/sync', json={'disponibilites': nouveau},
+                       headers=admin_headers).status_code == 200
+    assert _jours(client) == [4]
+
+
+def test_sync_sans_liste_ne_vide_pas_le_planning(client, admin_headers):
+    client.post('/api/disponibilites/sync', json={'disponibilites': PLANNING}, headers=admin_headers)
+
+    for body in ({}, {'disponibilites': 'x'}, {'disponibilites': [1]}):
+        response = client.post('/api/disponibilites/sync', json=body, headers=admin_headers)
+        assert response.status_code == 400
+
+    assert _jours(client) == [0, 2]
+
+
+def test_cache_ignore_une_lecture_invalidee_en_cours(client):
+    api_cloud = sys.modules['api_cloud']
+    api_cloud._invalidate_disponibilites_cache()
+
+    class SessionInvalidee:
+        """Simule une synchro concurrente pendant le SELECT (bascule gevent)"""
+        def __init__(self, db):
+            self.db = db
+
+        def execute(self, *args, **kwargs):
+            result = self.db.execute(*args, **kwargs)
+            api_cloud._invalidate_disponibilites_cache()
+            return result
+
+    with api_cloud.app.app_context():
+        api_cloud._get_disponibilites_cached(SessionInvalidee(api_cloud.SessionLocal()))
+        assert api_cloud._dispo_cache['rows'] is None
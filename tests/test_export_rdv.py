@@ -0,0 +1,25 @@
+"""
+Tests de l'export admin des rendez-vous (protégé par ADMIN_TOKEN)
+"""
+
+import sys
+
+
+def test_export_desactive_sans_admin_token(client, monkeypatch):
+    monkeypatch.setattr(sys.modules['api_cloud'], 'ADMIN_TOKEN', None)
+    response = client.get('/api/admin/export-rdv', headers={'X-Admin-Token': ''})
+    assert response.status_code == 403
+
+
+def test_export_refuse_un_mauvais_jeton(client, monkeypatch):
+    monkeypatch.setattr(sys.modules['api_cloud'], 'ADMIN_TOKEN', 'secret')
+    assert client.get('/api/admin/export-rdv').status_code == 403
+    response = client.get('/api/admin/export-rdv', headers={'X-Admin-Token': 'autre'})
+    assert response.status_code == 403
+
+
+def test_export_avec_le_bon_jeton(client, monkeypatch):
+    monkeypatch.setattr(sys.modules['api_cloud'], 'ADMIN_TOKEN', 'secret')
+    response = client.get('/api/admin/export-rdv', headers={'X-Admin-Token': 'secret'})
+    assert response.status_code == 200
+    assert response.get_json() == {'success': True, 'rdvs': []}
@@ -0,0 +1,54 @@
+"""
+Tests des routes familles (connexion, liste paginée)
+"""
+
+import pytest
+
+
+@pytest.fixture(scope='module')
+def famille(client):
+    """Famille active rattachée à un nouveau résident"""
+    resident = client.post('/api/residents/sync', json={'nom': 'Login', 'prenom': 'Resident'}).get_json()
+    client.post('/api/register', json={
+        'resident_id': resident['resident']['id'], 'nom': 'Login', 'prenom': 'Famille',
+        'email': 'login@exemple.fr', 'mot_de_passe': 'secret-pw'
+    })
+    client.post('/api/familles/activate', json={'email': 'login@exemple.fr'})
+    return resident['resident']
+
+
+def test_login_reussi(client, famille):
+    response = client.post('/api/login', json={'email': 'login@exemple.fr', 'code': 'secret-pw'})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['famille']['email'] == 'login@exemple.fr'
+    assert body['resident']['id'] == famille['id']
+
+
+@pytest.mark.parametrize('code', ['mauvais', 'secret-pw ', '', None, 123, ['secret-pw']])
+def test_login_refuse_les_codes_invalides(client, famille, code):
+    response = client.post('/api/login', json={'email': 'login@exemple.fr', 'code': code})
+    assert response.status_code == 401
+    assert response.get_json()['message'] == 'Mot de passe incorrect'
+
+
+def test_login_email_inconnu(client, famille):
+    response = client.post('/api/login', json={'email': 'inconnu@exemple.fr', 'code': 'secret-pw'})
+    assert response.status_code == 401
+
+
+def test_familles_pagination(client, famille):
+    client.post('/api/register', json={'resident_id': famille['id'], 'nom': 'Page', 'prenom': 'A', 'email': 'page-a@exemple.fr'})
+    client.post('/api/register', json={'resident_id': famille['id'], 'nom': 'Page', 'prenom': 'B', 'email': 'page-b@exemple.fr'})
+
+    ids = [f['id'] for f in client.get('/api/familles').get_json()['familles']]
+    assert len(ids) >= 3
+    assert ids == sorted(ids)
+
+    def page(query):
+        return [f['id'] for f in client.get(f'/api/familles?{query}').get_json()['familles']]
+
+    assert page('limit=2') == ids[:2]
+    assert page('limit=2&offset=1') == ids[1:3]
+    assert page(f'limit=2&offset={len(ids)}') == []
+    assert page('limit=abc') == ids
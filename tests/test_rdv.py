@@ -0,0 +1,62 @@
+"""
+Tests de l'annulation groupée des rendez-vous
+"""
+
+import itertools
+
+import pytest
+
+_numeros = itertools.count()
+
+
+@pytest.fixture
+def rdv_ids(client):
+    """Crée une famille et trois demandes de RDV, renvoie (famille_id, ids)"""
+    numero = next(_numeros)
+    resident = client.post('/api/residents/sync', json={'nom': f'Rdv{numero}', 'prenom': 'Resident'}).get_json()
+    resident_id = resident['resident']['id']
+    client.post('/api/register', json={
+        'resident_id': resident_id, 'nom': 'Rdv', 'prenom': 'Famille',
+        'email': f'rdv{numero}@exemple.fr', 'mot_de_passe': 'pw'
+    })
+    famille_id = client.get('/api/familles').get_json()['familles'][-1]['id']
+    ids = []
+    for jour in (1, 2, 3):
+        response = client.post('/api/rdv/request', json={
+            'famille_id': famille_id, 'resident_id': resident_id,
+            'date': f'2099-06-0{jour}', 'time': '10:00'
+        })
+        ids.append(response.get_json()['rdv_id'])
+    return famille_id, ids
+
+
+def _ids_actifs(client, famille_id):
+    return [rdv['id'] for rdv in client.get(f'/api/rdv/{famille_id}').get_json()['rdvs']]
+
+
+def test_bulk_cancel_exige_le_jeton_admin(client, admin_headers, rdv_ids):
+    famille_id, ids = rdv_ids
+    assert client.post('/api/rdv/bulk-cancel', json={'ids': ids}).status_code == 403
+    assert _ids_actifs(client, famille_id) == ids
+
+
+def test_bulk_cancel_annule_les_rdv_demandes(client, admin_headers, rdv_ids):
+    famille_id, ids = rdv_ids
+    response = client.post('/api/rdv/bulk-cancel', json={'ids': ids[:2] + [999999]}, headers=admin_headers)
+    assert response.status_code == 200
+    assert response.get_json()['count'] == 2
+    assert _ids_actifs(client, famille_id) == ids[2:]
+
+
+@pytest.mark.parametrize('ids', [[], 'x', [True], ['1'], [1.0]])
+def test_bulk_cancel_rejette_les_identifiants_invalides(client, admin_headers, rdv_ids, ids):
+    famille_id, existing = rdv_ids
+    response = client.post('/api/rdv/bulk-cancel', json={'ids': ids}, headers=admin_headers)
+    assert response.status_code == 400
+    assert _ids_actifs(client, famille_id) == existing
+
+
+def test_bulk_cancel_limite_la_taille_de_la_liste(client, admin_headers):
+    ids = list(range(1, 502))
+    response = client.post('/api/rdv/bulk-cancel', json={'ids': ids}, headers=admin_headers)
+    assert response.status_code == 400
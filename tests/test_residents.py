@@ -0,0 +1,52 @@
+"""
+Tests des routes résidents (liste, désactivation, synchronisation groupée)
+"""
+
+
+def _noms(client):
+    return {(r['nom'], r['prenom']) for r in client.get('/api/residents').get_json()['residents']}
+
+
+def test_resident_desactive_disparait_aussitot_de_la_liste(client):
+    resident = client.post('/api/residents/sync', json={'nom': 'Desactive', 'prenom': 'Test'}).get_json()
+    assert ('Desactive', 'Test') in _noms(client)
+
+    response = client.post(f"/api/residents/{resident['resident']['id']}/delete")
+    assert response.status_code == 200
+    assert ('Desactive', 'Test') not in _noms(client)
+
+
+def test_sync_bulk_cree_puis_met_a_jour(client):
+    response = client.post('/api/residents/sync-bulk', json={'residents': [
+        {'nom': 'Bulk', 'prenom': 'Alice', 'chambre': '1'},
+        {'nom': 'Bulk', 'prenom': 'Bob', 'chambre': '2'},
+    ]})
+    assert response.get_json() == {'success': True, 'created': 2, 'updated': 0}
+
+    response = client.post('/api/residents/sync-bulk', json={'residents': [
+        {'nom': 'Bulk', 'prenom': 'Alice', 'chambre': '10'},
+        {'nom': 'Bulk', 'prenom': 'Carole', 'chambre': '3'},
+    ]})
+    assert response.get_json() == {'success': True, 'created': 1, 'updated': 1}
+
+    chambres = {
+        r['prenom']: r['chambre']
+        for r in client.get('/api/residents').get_json()['residents'] if r['nom'] == 'Bulk'
+    }
+    assert chambres == {'Alice': '10', 'Bob': '2', 'Carole': '3'}
+
+
+def test_sync_bulk_nom_repete_dans_la_meme_liste(client):
+    response = client.post('/api/residents/sync-bulk', json={'residents': [
+        {'nom': 'Doublon', 'prenom': 'Denis', 'chambre': '5'},
+        {'nom': 'Doublon', 'prenom': 'Denis', 'chambre': '6'},
+    ]})
+    # Une seule ligne créée, la dernière occurrence l'emporte
+    assert response.get_json() == {'success': True, 'created': 1, 'updated': 1}
+    doublons = [r for r in client.get('/api/residents').get_json()['residents'] if r['nom'] == 'Doublon']
+    assert [r['chambre'] for r in doublons] == ['6']
+
+
+def test_sync_bulk_liste_vide(client):
+    assert client.post('/api/residents/sync-bulk', json={'residents': []}).status_code == 400
+    assert client.post('/api/residents/sync-bulk', json={}).status_code == 400